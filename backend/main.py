@@ -6,24 +6,59 @@
 #   - File, UploadFile: Handle file uploads from clients
 #   - HTTPException: Raise HTTP errors (404, 500, etc.)
 #   - BackgroundTasks: Run tasks after sending response (not used here, we use asyncio instead)
+#   - Request, Response: Read request headers (like If-None-Match) and set response headers (like ETag)
 #   - CORSMiddleware: Allow frontend apps to make requests (cross-origin resource sharing)
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+#   - GZipMiddleware: Compress large responses (like finished transcripts)
+#   - WebSocket: A connection the server can push messages through (see the /ws endpoint)
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 
-# whisper: OpenAI's speech-to-text library (the AI model that does transcription)
-import whisper
+# faster_whisper: A re-implementation of OpenAI's Whisper speech-to-text model on
+# top of CTranslate2, a C++ inference engine. It runs the same model weights with
+# int8 quantization and a fused beam-search decoder, which is several times faster
+# (and uses much less memory) than the reference PyTorch implementation on CPU.
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.feature_extractor import FeatureExtractor
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+# ctranslate2: The inference engine faster-whisper runs on (used to detect GPUs)
+import ctranslate2
+
+# redis: Client for Redis, the optional shared job store (see DATA STORAGE below)
+import redis.asyncio as aioredis
+
+# orjson: A much faster JSON encoder/decoder (written in Rust) than the built-in json module
+import orjson
+
+# cachetools: Dictionaries with a size limit and expiry, for the in-memory job store
+from cachetools import LRUCache, TTLCache
+
+# av (PyAV): Python bindings for the ffmpeg libraries, used to decode uploaded files
+import av
+
+# numpy: Fast arrays of numbers - decoded audio is a numpy array of float32 samples
+import numpy as np
+
+# msgpack: A compact binary alternative to JSON (see COMPACT SEGMENTS below)
+import msgpack
+
+# aiofiles: File operations that don't block the event loop (used to save uploads)
+import aiofiles.tempfile
 
 # Standard library imports for file handling, system operations, and async programming
-import tempfile  # Create temporary files for uploaded audio
 import os        # File system operations (paths, environment variables)
+import re        # Regular expressions (used to find a file name's extension)
 import uuid      # Generate unique IDs for transcription jobs
+import hashlib   # Fingerprint uploaded files to recognize repeated uploads
+import math      # Math helpers (rounding up when splitting audio into chunks)
+import wave      # Read plain WAV files (see load_audio)
 from typing import Optional, Dict  # Type hints for better code documentation
 import asyncio   # Handle asynchronous operations (background tasks)
 from pydantic import BaseModel  # Data validation and serialization (like TypeScript interfaces)
 import logging   # Log messages for debugging and monitoring
 import sys       # System-specific parameters and functions
-import shutil    # File operations (like finding executables in PATH)
 
 # ============================================================================
 # LOGGING SETUP
@@ -35,25 +70,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)  # Create a logger for this specific file
 
 # ============================================================================
-# FFMPEG SETUP
+# AUDIO DECODING (NO FFMPEG NEEDED)
 # ============================================================================
-# ffmpeg is a tool that converts audio/video files. Whisper needs it to process
-# various audio formats. This section ensures ffmpeg can be found even if it's
-# not in the default PATH (common on macOS with Homebrew installations).
-#
-# How it works:
-# 1. Check if ffmpeg is already in PATH
-# 2. If not, add common installation directories to PATH
-# 3. Verify ffmpeg is now accessible
-BREW_PATHS = ["/opt/homebrew/bin", "/usr/local/bin", "/usr/bin", "/bin"]
-if shutil.which("ffmpeg") is None:
-    extra_paths = ":".join([p for p in BREW_PATHS if os.path.isdir(p)])
-    os.environ["PATH"] = f"{extra_paths}:{os.environ.get('PATH','')}"
-ffmpeg_path = shutil.which("ffmpeg")
-if ffmpeg_path:
-    logger.info(f"ffmpeg found at: {ffmpeg_path}")
-else:
-    logger.warning("ffmpeg not found on PATH. Please install via Homebrew: `brew install ffmpeg`")
+# Uploaded files are decoded with PyAV (the "av" package), which comes with its
+# own copy of the ffmpeg libraries and decodes inside the worker process (see
+# _load_pcm below). No ffmpeg program is started for a transcription, so ffmpeg
+# doesn't need to be installed or found on PATH.
 
 # ============================================================================
 # WHISPER CACHE CONFIGURATION
@@ -62,11 +84,11 @@ else:
 # We configure a cache directory so the model is downloaded once and reused.
 # This saves time and bandwidth on subsequent server starts.
 #
-# The cache directory is typically at ~/.cache/whisper (in your home folder)
+# The cache directory is typically at ~/.cache/whisper (in your home folder).
+# faster-whisper downloads the converted CTranslate2 model from Hugging Face
+# into this directory (passed as download_root when the model is loaded).
 cache_dir = os.path.expanduser('~/.cache/whisper')
 os.makedirs(cache_dir, exist_ok=True)  # Create directory if it doesn't exist
-os.environ['XDG_CACHE_HOME'] = os.path.expanduser('~/.cache')
-os.environ['WHISPER_CACHE'] = cache_dir
 logger.info(f"Whisper cache directory set to: {cache_dir}")
 
 # Running in development mode (Python directly, not bundled)
@@ -77,9 +99,13 @@ logger.info("Running in development mode")
 # ============================================================================
 # signal: Handle system signals (like Ctrl+C) for graceful shutdown
 # asynccontextmanager: Create a context manager for startup/shutdown logic
+# multiprocessing / ProcessPoolExecutor: Run transcriptions in separate worker processes
 import signal
 import sys
 from contextlib import asynccontextmanager
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # ============================================================================
 # BACKGROUND TASK TRACKING
@@ -107,47 +133,66 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan - startup and shutdown logic"""
 
     # ========================================================================
-    # STARTUP: Load the Whisper AI model
+    # STARTUP: Start the worker processes and load the Whisper AI model
     # ========================================================================
-    # The "global" keyword means we're modifying the model variable defined
-    # at the module level (line 120), not creating a new local variable.
-    global model
-    logger.info(f"Loading Whisper model: {MODEL_SIZE}")
+    # The "global" keyword means we're modifying the executor variable defined
+    # at the module level, not creating a new local variable.
+    global executor, model_loaded, model_warmed_up, job_store, segment_queue
+    logger.info(f"Loading Whisper model: {MODEL_PATH or MODEL_SIZE} on {DEVICE} ({COMPUTE_TYPE}) in {TRANSCRIBE_WORKERS} worker process(es), batch size {BATCH_SIZE}")
+
+    # Keep jobs in Redis instead of this process's memory if REDIS_URL is set
+    if REDIS_URL:
+        job_store = RedisJobStore(REDIS_URL)
+        logger.info("Storing transcription jobs in Redis")
 
     # Ensure cache directory exists and is writable
-    cache_dir = os.path.expanduser('~/.cache/whisper')
     os.makedirs(cache_dir, exist_ok=True)
     logger.info(f"Whisper cache directory: {cache_dir}")
 
-    # Try multiple strategies to load the model (with fallbacks):
-    # 1. First: Try loading from our specified cache directory
-    # 2. Second: Try loading from Whisper's default cache location
-    # 3. Third: Download the model if it doesn't exist anywhere
-    # This ensures the server starts even if the cache is in an unexpected location
-    try:
-        # First try to load from cache directory
-        model = whisper.load_model(MODEL_SIZE, download_root=cache_dir)
-        logger.info("Model loaded successfully from cache!")
-    except Exception as e:
-        logger.error(f"Failed to load model from cache: {e}")
-        # Try loading without specifying download_root (uses default cache)
+    # Create the pool of worker processes. Each worker runs _init_worker once
+    # when it starts, which loads its own copy of the model.
+    #
+    # We use the "spawn" start method so every worker starts from a fresh Python
+    # interpreter instead of a fork of this server process (forking a process
+    # that already runs threads, like uvicorn, can deadlock).
+    #
+    # The workers send every segment back as soon as it is transcribed through
+    # segment_queue, a queue shared between processes (see STREAMING PARTIAL
+    # TRANSCRIPTS below). A Manager runs the queue in its own small process.
+    #
+    # The thread limits (see THREADS_PER_WORKER below) are set as environment
+    # variables here, so the worker processes inherit them.
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(THREADS_PER_WORKER))
+    logger.info(
+        f"Each worker uses {THREADS_PER_WORKER} CPU thread(s) ("
+        + ", ".join(f"{var}={os.environ[var]}" for var in THREAD_ENV_VARS) + ")"
+    )
+    manager = multiprocessing.get_context("spawn").Manager()
+    segment_queue = manager.Queue()
+    executor = create_executor()
+
+    # Start the workers now (submitting one call per worker makes the pool start
+    # all of them) and wait until the model is loaded. If loading fails in a
+    # worker, this raises a ModelLoadError, which crashes the server (can't
+    # work without a model) after stopping the processes started above.
+    #
+    # With LAZY_LOAD_MODEL we skip this: the pool only starts a worker (which
+    # then loads the model) when the first transcription is handed to it.
+    if LAZY_LOAD_MODEL:
+        logger.info("LAZY_LOAD_MODEL is set: the model will be loaded by the first transcription")
+    else:
         try:
-            model = whisper.load_model(MODEL_SIZE)
-            logger.info("Model loaded successfully from default cache!")
-        except Exception as e2:
-            logger.error(f"Failed to load model from default cache: {e2}")
-            # Last resort: force download and load
-            try:
-                logger.info("Attempting to download model...")
-                model = whisper.load_model(MODEL_SIZE, download_root=cache_dir, download=True)
-                logger.info("Model downloaded and loaded successfully!")
-            except Exception as e3:
-                logger.error(f"Failed to download and load model: {e3}")
-                raise e3  # If all attempts fail, crash the server (can't work without model)
+            model_warmed_up = await start_workers()
+        except Exception:
+            executor.shutdown(cancel_futures=True)
+            manager.shutdown()
+            raise
+        model_loaded = True
+        logger.info("Worker processes are ready!")
 
-    # Log presence of mel filter assets (debug)
-    mel_path = os.path.join(os.path.dirname(whisper.__file__), "assets", "mel_filters.npz")
-    logger.info(f"Whisper mel_filters path: {mel_path}; exists={os.path.exists(mel_path)}")
+    relay_task = asyncio.create_task(relay_segments(segment_queue))
+    expire_task = asyncio.create_task(expire_jobs())  # See DATA STORAGE below
 
     # ========================================================================
     # YIELD: Server is now running and ready to accept requests
@@ -174,6 +219,24 @@ async def lifespan(app: FastAPI):
     if background_tasks_set:
         await asyncio.gather(*background_tasks_set, return_exceptions=True)
 
+    # Stop the worker processes. cancel_futures=True drops transcriptions that
+    # haven't started yet; wait=False means we don't block on ones in progress.
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    # Stop relaying segments (None tells relay_segments to stop) and the queue's
+    # process. Ctrl+C may have stopped the manager process already, in which
+    # case relay_segments has stopped on its own.
+    try:
+        segment_queue.put(None)
+    except (EOFError, OSError):
+        pass
+    await relay_task
+    manager.shutdown()
+
+    expire_task.cancel()
+
+    await job_store.close()
+
     logger.info("Server shutdown complete")
 
 # ============================================================================
@@ -182,7 +245,17 @@ async def lifespan(app: FastAPI):
 # Create the main FastAPI application instance. This is like creating an Express
 # app in Node.js or a Flask app in Python. The "lifespan" parameter tells FastAPI
 # to use our lifespan function for startup/shutdown logic.
-app = FastAPI(title="Audio Transcription API", version="1.0.0", lifespan=lifespan)
+#
+# default_response_class makes every endpoint encode its JSON with orjson
+# instead of the built-in json module. orjson is several times faster, which
+# matters for the large segments list of a finished transcript. (It also encodes
+# numpy arrays and numbers directly.)
+app = FastAPI(
+    title="Audio Transcription API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # ============================================================================
 # CORS (CROSS-ORIGIN RESOURCE SHARING) CONFIGURATION
@@ -208,16 +281,147 @@ app.add_middleware(
     allow_headers=["*"],           # Allow all headers (can be more restrictive)
 )
 
+# ============================================================================
+# RESPONSE COMPRESSION
+# ============================================================================
+# A finished transcript with word timestamps is megabytes of JSON for an hour of
+# audio. GZipMiddleware compresses every response larger than 1 KB for clients
+# that accept it (all browsers do), which typically makes it 3-5x smaller.
+# Server-Sent Events (the /stream endpoint) are never compressed, since that
+# would hold the events back until a compressed block is full.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # ============================================================================
 # DATA STORAGE
 # ============================================================================
-# Store transcription jobs in memory (a Python dictionary).
-# Each job has a unique ID as the key, and job data as the value.
+# Transcription jobs are kept in a "job store". Each job has a unique ID as the
+# key, and job data (a dictionary) as the value:
+#   { "job-id-123": { "status": "completed", "text": "...", ... } }
+#
+# There are two kinds of job store with the same async methods (get, set,
+# update, delete), so the rest of the code doesn't care which one is used:
 #
-# Note: This is in-memory storage, so jobs are lost when the server restarts.
-# For production, you'd use a database (PostgreSQL, MongoDB) or Redis.
-# Dictionary structure: { "job-id-123": { "status": "completed", "text": "...", ... } }
-transcription_jobs: Dict[str, dict] = {}
+# - MemoryJobStore (default): Keeps jobs in memory inside this server process.
+#   Simple and needs no setup, but jobs are lost when the server restarts, and
+#   each server process has its own separate jobs. Finished jobs expire
+#   JOB_TTL_SECONDS after their last update, and at most JOB_CACHE_SIZE of them
+#   are kept (the oldest are dropped first), so memory use stays bounded.
+#   Queued and processing jobs are "pinned": they are kept separately and are
+#   never dropped while they run. The cache only notices that a job has expired
+#   when it is touched again, so every EXPIRE_INTERVAL_SECONDS a background task
+#   (started in lifespan) removes expired jobs and their memory is freed even
+#   when nobody asks for them.
+# - RedisJobStore (when the REDIS_URL environment variable is set): Keeps jobs
+#   in Redis, an in-memory database server. Jobs survive server restarts, all
+#   server processes (e.g. uvicorn --workers N) see the same jobs, and every
+#   finished job expires automatically JOB_TTL_SECONDS (1 hour) after its last
+#   update. Queued and processing jobs don't expire.
+#
+# The job store also caches finished transcripts by the content of the audio
+# file (see TRANSCRIPT CACHE in the upload endpoint), so uploading the same
+# file again returns the earlier result instead of transcribing it again.
+# The memory store keeps the TRANSCRIPT_CACHE_SIZE most recently used
+# transcripts; Redis keeps each one for TRANSCRIPT_TTL_SECONDS (1 day).
+JOB_TTL_SECONDS = 3600
+JOB_CACHE_SIZE = 10_000
+TRANSCRIPT_CACHE_SIZE = 100
+TRANSCRIPT_TTL_SECONDS = 86400
+EXPIRE_INTERVAL_SECONDS = 60
+REDIS_URL = os.environ.get("REDIS_URL")
+
+ACTIVE_STATUSES = ("queued", "processing")
+
+class MemoryJobStore:
+    """Job store backed by in-memory caches in this process"""
+
+    def __init__(self):
+        self.active: Dict[str, dict] = {}  # Queued and processing jobs (pinned)
+        self.jobs = TTLCache(maxsize=JOB_CACHE_SIZE, ttl=JOB_TTL_SECONDS)  # Finished jobs
+        self.transcripts = LRUCache(maxsize=TRANSCRIPT_CACHE_SIZE)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return self.active.get(job_id) or self.jobs.get(job_id)
+
+    async def set(self, job_id: str, job: dict):
+        # Move the job to the cache that matches its status
+        if job["status"] in ACTIVE_STATUSES:
+            self.jobs.pop(job_id, None)
+            self.active[job_id] = job
+        else:
+            self.active.pop(job_id, None)
+            self.jobs[job_id] = job  # (Re)starts its expiry time
+
+    async def update(self, job_id: str, **fields):
+        # The job may have been deleted (or expired) while it was being transcribed
+        job = await self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            await self.set(job_id, job)
+
+    async def delete(self, job_id: str) -> bool:
+        was_active = self.active.pop(job_id, None) is not None
+        was_finished = self.jobs.pop(job_id, None) is not None
+        return was_active or was_finished
+
+    async def get_transcript(self, key: str) -> Optional[dict]:
+        return self.transcripts.get(key)  # Also marks it as most recently used
+
+    async def set_transcript(self, key: str, result: dict):
+        self.transcripts[key] = result  # Drops the least recently used one if full
+
+    async def expire(self):
+        self.jobs.expire()
+
+    async def close(self):
+        pass
+
+class RedisJobStore:
+    """Job store backed by Redis; jobs and transcripts are JSON strings under job:<id> and transcript:<key>"""
+
+    def __init__(self, url: str):
+        self.redis = aioredis.from_url(url)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        data = await self.redis.get(f"job:{job_id}")
+        return orjson.loads(data) if data is not None else None
+
+    async def set(self, job_id: str, job: dict):
+        # Like the memory store, queued and processing jobs are pinned: they
+        # only get their expiry time once they are finished
+        ttl = None if job["status"] in ACTIVE_STATUSES else JOB_TTL_SECONDS
+        await self.redis.set(f"job:{job_id}", orjson.dumps(job), ex=ttl)
+
+    async def update(self, job_id: str, **fields):
+        # The job may have been deleted (or expired) while it was being transcribed
+        job = await self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            await self.set(job_id, job)
+
+    async def delete(self, job_id: str) -> bool:
+        return await self.redis.delete(f"job:{job_id}") > 0
+
+    async def get_transcript(self, key: str) -> Optional[dict]:
+        data = await self.redis.get(f"transcript:{key}")
+        return orjson.loads(data) if data is not None else None
+
+    async def set_transcript(self, key: str, result: dict):
+        await self.redis.set(f"transcript:{key}", orjson.dumps(result), ex=TRANSCRIPT_TTL_SECONDS)
+
+    async def expire(self):
+        pass  # Redis removes expired keys itself
+
+    async def close(self):
+        await self.redis.aclose()
+
+# Replaced with a RedisJobStore at startup if REDIS_URL is set
+job_store = MemoryJobStore()
+
+async def expire_jobs():
+    """Remove expired jobs from the job store every EXPIRE_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(EXPIRE_INTERVAL_SECONDS)
+        await job_store.expire()
 
 # ============================================================================
 # WHISPER MODEL CONFIGURATION
@@ -229,10 +433,546 @@ transcription_jobs: Dict[str, dict] = {}
 # - medium: Great accuracy (current choice)
 # - large-v3: Best accuracy, slowest
 #
-# The model variable will be set during startup (in the lifespan function).
-# We initialize it to None so we can check if it's loaded before processing requests.
+# The model itself is loaded inside the worker processes (see TRANSCRIPTION
+# WORKER PROCESSES below); model_loaded becomes True once they are ready.
+#
+# Loading the model takes several seconds and about 1 GB of memory per worker.
+# Set LAZY_LOAD_MODEL=1 to start the server without loading it: the worker
+# processes are started, and load the model, when the first file is uploaded.
+# The server then starts almost instantly and uses little memory while idle,
+# but the first transcription takes longer.
 MODEL_SIZE = "medium"
-model = None  # Will be loaded at startup
+LAZY_LOAD_MODEL = os.environ.get("LAZY_LOAD_MODEL", "").lower() in ("1", "true", "yes")
+model_loaded = False  # Set to True at startup (or by the first transcription with LAZY_LOAD_MODEL)
+model_warmed_up = False  # Set to True at startup if the warmup run succeeded
+
+# By default the model is downloaded from Hugging Face in CTranslate2 format and
+# quantized to int8 every time it is loaded. You can instead convert it once,
+# ahead of time, and point WHISPER_MODEL_PATH at the output directory:
+#
+#   ct2-transformers-converter --model openai/whisper-medium \
+#       --output_dir ~/.cache/whisper/whisper-medium-int8 \
+#       --copy_files tokenizer.json preprocessor_config.json --quantization int8
+#
+# The converted model stores int8 weights on disk, so it is ~4x smaller than the
+# float32 original and loads without a conversion step at startup.
+MODEL_PATH = os.environ.get("WHISPER_MODEL_PATH")
+
+# Where the model runs. If an NVIDIA GPU with CUDA is available we use it with
+# int8-quantized weights and 16-bit float (float16) math ("int8_float16"): the
+# weights take half the GPU memory of float16 and GPUs compute in float16 much
+# faster than in 32-bit floats. Otherwise we run on the CPU with int8-quantized
+# weights. Set WHISPER_DEVICE to "cpu" or "cuda" to choose the device yourself;
+# any other value stops the server at startup instead of silently using the CPU.
+#
+# Apple Silicon GPUs (PyTorch's "mps" device) are not supported by
+# CTranslate2. On those Macs the model runs on the CPU, where CTranslate2 uses
+# Apple's Accelerate framework for the matrix math.
+#
+# Quantization can cost a little accuracy for some languages. Set the
+# WHISPER_COMPUTE_TYPE environment variable to override the choice, e.g.
+# "float32" to turn quantization off on the CPU, or "int8_float32" to keep int8
+# weights but compute in float32. CTranslate2 converts the weights when the
+# model is loaded.
+DEVICE = os.environ.get("WHISPER_DEVICE", "").lower() or ("cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu")
+if DEVICE not in ("cpu", "cuda"):
+    raise ValueError(f"Unsupported WHISPER_DEVICE {DEVICE!r}, use \"cpu\" or \"cuda\"")
+COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE") or ("int8_float16" if DEVICE == "cuda" else "int8")
+
+# ============================================================================
+# TRANSCRIPTION WORKER PROCESSES
+# ============================================================================
+# Transcription is CPU-heavy work that takes seconds to minutes. If we ran it
+# directly inside an async function, it would block the asyncio event loop and
+# the server couldn't answer any other request (health checks, status polling,
+# new uploads) until the transcription finished.
+#
+# Instead, we run transcriptions in a pool of separate worker processes
+# (ProcessPoolExecutor). Each worker loads its own copy of the model once, when
+# it starts, and keeps it in the process-global worker_model variable. The
+# server process only hands file paths to the workers and awaits the results.
+# This also lets several transcriptions run in parallel on multi-core machines.
+#
+# By default a single worker is used, and on the CPU it gets all the cores.
+# The cores are split evenly between the workers (so their CTranslate2 threads
+# don't compete for the same cores), and a worker's thread count is fixed when
+# it loads the model. So with several workers, a short clip (one chunk, see
+# CHUNK_MIN_SECONDS below) would run on one worker's share of the cores while
+# the others sit idle - the common case when one person uses the app. On a GPU
+# every worker would also hold its own copy of the model in GPU memory.
+#
+# When uvicorn runs several server processes (WEB_CONCURRENCY, see SERVER
+# STARTUP below), each one has its own pool of workers, so the cores are first
+# split between the server processes.
+#
+# Set TRANSCRIBE_WORKERS to run more workers, e.g. on a server where several
+# people upload at the same time: a few workers with a few cores each get
+# through more files per hour than one worker with all of them (CTranslate2
+# doesn't speed up much beyond ~4-8 threads), and long files are split across
+# them. Each worker loads its own copy of the model.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+SERVER_CORES = max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS") or 1)
+
+# ----------------------------------------------------------------------------
+# Thread pinning
+# ----------------------------------------------------------------------------
+# Each worker may use THREADS_PER_WORKER threads, so all workers together use
+# exactly the server's share of the cores. CTranslate2 is told this directly
+# (cpu_threads, see _load_model). The other native libraries in a worker -
+# numpy's BLAS (used for the mel spectrogram) and OpenMP - would otherwise each
+# start one thread per core in every worker, and all those threads fighting
+# over the same cores slows everything down. Those libraries read their thread
+# count from environment variables when they are imported, so the lifespan sets
+# them before starting the workers (unless you set them yourself).
+THREADS_PER_WORKER = max(1, SERVER_CORES // TRANSCRIBE_WORKERS)
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# ----------------------------------------------------------------------------
+# Batched inference
+# ----------------------------------------------------------------------------
+# Whisper's encoder turns 30-second windows of audio into features the decoder
+# works from. Normally a transcription runs the encoder on one window at a time.
+# faster-whisper's BatchedInferencePipeline instead cuts the speech into
+# windows with VAD and runs the encoder (and decoder) on BATCH_SIZE windows in
+# a single pass, which keeps a GPU much busier and is several times faster.
+# Each window is then transcribed on its own (without the text of the window
+# before it as context).
+#
+# This changes the transcript, so batching is off unless you turn it on with
+# WHISPER_BATCH_SIZE (e.g. 8 on a GPU):
+# - Each window is decoded only once, at temperature 0: the retries at higher
+#   temperatures that normally fix repetitive or garbled output are skipped.
+# - Without context from the previous window, sentences cut by a window
+#   boundary can come out slightly differently.
+# We ask the pipeline for timestamps (without_timestamps=False), so segments
+# stay sentence-sized; by default it returns one segment per VAD window (up to
+# 30 seconds long).
+BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE") or 1)
+
+# A transcript depends on the model and how it runs, so these settings are part
+# of the transcript cache key (see TRANSCRIPT CACHE in the upload endpoint).
+# After changing one of them (e.g. WHISPER_COMPUTE_TYPE=float32 to fix an
+# accuracy problem), files are transcribed again instead of reusing old results.
+TRANSCRIPT_SETTINGS = hashlib.blake2b(
+    f"{MODEL_PATH or MODEL_SIZE}|{DEVICE}|{COMPUTE_TYPE}|{BATCH_SIZE}".encode(), digest_size=4
+).hexdigest()
+
+executor: Optional[ProcessPoolExecutor] = None  # Created at startup
+segment_queue = None  # Created at startup, shared with the worker processes
+worker_model = None  # Only set inside worker processes
+worker_pipeline = None  # Only set inside worker processes, if BATCH_SIZE > 1
+worker_warmed_up = False  # Only set inside worker processes
+worker_segment_queue = None  # Only set inside worker processes
+worker_model_args = None  # Only set inside worker processes: _load_model's arguments
+
+class ModelLoadError(RuntimeError):
+    """The Whisper model could not be loaded (e.g. offline, or a bad WHISPER_MODEL_PATH)"""
+
+def _load_model(model_size: str, model_path: Optional[str], cache_dir: str) -> WhisperModel:
+    """Load the Whisper model, downloading it into cache_dir if needed"""
+    # Model options:
+    # - device: "cuda" (NVIDIA GPU) or "cpu", see DEVICE above
+    # - compute_type: "int8" (CPU) and "int8_float16" (GPU) quantize the weights
+    #   to 8-bit integers. This halves memory traffic compared to 16-bit weights
+    #   and uses fast int8 instructions.
+    # - cpu_threads: How many CPU threads CTranslate2 may use for one transcription
+    # - num_workers=1: Each worker process only runs one transcription at a time
+    model_options = dict(
+        device=DEVICE,
+        compute_type=COMPUTE_TYPE,
+        cpu_threads=THREADS_PER_WORKER,
+        num_workers=1,
+        download_root=cache_dir,
+    )
+
+    # A pre-converted model directory was provided (see MODEL_PATH above),
+    # so there is nothing to download - load it directly.
+    if model_path:
+        return WhisperModel(model_path, **model_options)
+
+    # Otherwise, try multiple strategies to load the model (with fallbacks):
+    # 1. First: Load from our cache directory without touching the network
+    # 2. Second: Download the model into the cache directory if it isn't there yet
+    # This ensures the server starts offline once the model has been downloaded.
+    try:
+        # First try to load from cache directory
+        model = WhisperModel(model_size, local_files_only=True, **model_options)
+        logger.info("Model loaded successfully from cache!")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load model from cache: {e}")
+        # Last resort: download and load
+        logger.info("Attempting to download model...")
+        model = WhisperModel(model_size, **model_options)
+        logger.info("Model downloaded and loaded successfully!")
+        return model
+
+def _ensure_model():
+    """Load the model in this worker process if it isn't loaded yet; raises ModelLoadError on failure"""
+    global worker_model, worker_pipeline
+    if worker_model is not None:
+        return
+    try:
+        model = _load_model(*worker_model_args)
+    except Exception as e:
+        raise ModelLoadError(f"Model failed to load: {e}") from None
+    model.feature_extractor = CachedFeatureExtractor(**model.feat_kwargs)
+    if BATCH_SIZE > 1:
+        worker_pipeline = BatchedInferencePipeline(model=model)
+    worker_model = model
+
+def _init_worker(model_size: str, model_path: Optional[str], cache_dir: str, segment_queue=None):
+    """Runs once in each worker process when it starts: load the model"""
+    global worker_model_args, worker_segment_queue
+    worker_model_args = (model_size, model_path, cache_dir)
+    worker_segment_queue = segment_queue
+
+    # If the model can't be loaded, we must not raise here: an exception in a
+    # pool initializer kills the worker and breaks the whole pool, which would
+    # look like a crash. Instead the worker stays up without a model, and every
+    # task it runs tries to load it again (see _ensure_model), failing that
+    # job with a ModelLoadError that says why.
+    try:
+        _ensure_model()
+    except ModelLoadError as e:
+        logger.error(str(e))
+        return
+
+    # Warm up the model by transcribing one second of silence. The first
+    # transcription pays one-time costs (reading the weights into memory, GPU
+    # kernel setup, lazy imports); doing it here means the first real upload
+    # doesn't have to wait for them. A failed warmup is logged but not fatal.
+    # With LAZY_LOAD_MODEL a real upload is already waiting, so we skip it.
+    global worker_warmed_up
+    if LAZY_LOAD_MODEL:
+        return
+    try:
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        segments_iter, _ = worker_model.transcribe(silence, language="en", word_timestamps=False)
+        list(segments_iter)  # The generator does the actual work, so run it
+        worker_warmed_up = True
+        logger.info("Model warmup done")
+    except Exception as e:
+        logger.warning(f"Warmup failed (non-fatal): {e}")
+
+def _worker_ready() -> bool:
+    """Used at startup to wait until a worker has loaded the model; returns whether it warmed up"""
+    _ensure_model()
+    return worker_warmed_up
+
+def create_executor() -> ProcessPoolExecutor:
+    """Create the pool of worker processes; each one runs _init_worker when it starts"""
+    return ProcessPoolExecutor(
+        max_workers=TRANSCRIBE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(MODEL_SIZE, MODEL_PATH, cache_dir, segment_queue),
+    )
+
+async def start_workers() -> bool:
+    """Start every worker now and wait until it has loaded the model; returns whether all warmed up"""
+    loop = asyncio.get_running_loop()
+    warmups = await asyncio.gather(*[
+        loop.run_in_executor(executor, _worker_ready)
+        for _ in range(TRANSCRIBE_WORKERS)
+    ])
+    return all(warmups)
+
+# ----------------------------------------------------------------------------
+# Recovering from a crashed worker
+# ----------------------------------------------------------------------------
+# If a worker process dies (killed for using too much memory, or a crash in
+# CTranslate2's native code), the whole pool is "broken": every call to it
+# fails with BrokenProcessPool from then on. The jobs running at that moment
+# fail, and restart_workers replaces the pool with a new one whose workers load
+# the model again. Until the new workers are ready, workers_healthy is False
+# and /health answers 503, so a process manager or orchestrator can restart
+# the server if the workers don't come back.
+#
+# A model that can't be loaded is a different problem: the workers stay up
+# (see _init_worker) and each job fails with a ModelLoadError instead. Its
+# message is kept in model_load_error and shown by /health (also with 503),
+# until a later job loads the model successfully.
+workers_healthy = True
+workers_restart_lock = asyncio.Lock()
+model_load_error: Optional[str] = None
+
+def set_model_load_error(error: Optional[str]):
+    """Remember why the model failed to load (None once it has loaded)"""
+    global model_load_error
+    if error and error != model_load_error:
+        logger.error(error)
+    model_load_error = error
+
+async def restart_workers(broken: ProcessPoolExecutor):
+    """Replace a broken pool of worker processes with a new one"""
+    global executor, workers_healthy
+    async with workers_restart_lock:
+        if executor is not broken:
+            return  # Another failed job has already replaced it
+        workers_healthy = False
+        logger.error("A transcription worker process died, restarting the worker processes")
+        broken.shutdown(wait=False, cancel_futures=True)
+        executor = create_executor()
+        try:
+            if not LAZY_LOAD_MODEL:  # (Otherwise the next transcription starts them)
+                await start_workers()
+            workers_healthy = True
+            logger.info("Worker processes restarted")
+        except ModelLoadError as e:
+            set_model_load_error(str(e))
+            workers_healthy = True  # The workers are up, only the model is missing
+        except Exception as e:
+            logger.error(f"Restarting the worker processes failed: {str(e)}")
+
+# ----------------------------------------------------------------------------
+# Log-mel spectrogram (the model's input features)
+# ----------------------------------------------------------------------------
+# Before the model sees the audio, it is converted into a log-mel spectrogram:
+# a short-time FFT over 25 ms windows, projected onto 80 mel frequency bands.
+# faster-whisper's FeatureExtractor already computes the mel filterbank once,
+# but on every call it rebuilds the Hann window and makes a full float32 copy
+# of the audio even when it already is float32 (for an hour of audio that is a
+# 230 MB copy). This subclass builds the window once and skips that copy.
+# It is installed on each worker's model in _init_worker.
+class CachedFeatureExtractor(FeatureExtractor):
+    """FeatureExtractor that reuses its FFT window and avoids copying float32 audio"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.window = np.hanning(self.n_fft + 1)[:-1].astype(np.float32)
+
+    def __call__(self, waveform: np.ndarray, padding=160, chunk_length=None):
+        """Compute the log-mel spectrogram of the provided audio"""
+        if chunk_length is not None:
+            self.n_samples = chunk_length * self.sampling_rate
+            self.nb_max_frames = self.n_samples // self.hop_length
+
+        waveform = np.asarray(waveform, dtype=np.float32)  # No copy if already float32
+        if padding:
+            waveform = np.pad(waveform, (0, padding))
+
+        stft = self.stft(
+            waveform,
+            self.n_fft,
+            self.hop_length,
+            window=self.window,
+            return_complex=True,
+        )[..., :-1]
+        magnitudes = (stft.real ** 2 + stft.imag ** 2).astype(np.float32)  # |stft|^2 without a sqrt
+
+        mel_spec = self.mel_filters @ magnitudes
+
+        log_spec = np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+# ----------------------------------------------------------------------------
+# Decoded audio cache
+# ----------------------------------------------------------------------------
+# Whisper works on 16 kHz mono audio stored as float32 samples. Decoding an MP3
+# or video file into that format is a significant amount of work, so we do it
+# once per upload and save the decoded samples next to the uploaded file as a
+# ".npy" file (numpy's binary array format). Anything that needs the audio
+# again for the same job loads the .npy file instead of decoding again.
+#
+# The .npy file is memory-mapped (mmap_mode="r") instead of read: numpy maps
+# the file into memory and the operating system only reads the parts that are
+# actually used, straight from its page cache. A worker transcribing one chunk
+# of an hour-long file therefore reads only that chunk's samples, and workers
+# transcribing the same file share the same cached pages instead of each
+# holding its own full copy of the audio.
+SAMPLE_RATE = 16000  # Whisper expects 16,000 samples per second
+
+DECODE_BLOCK_SAMPLES = 500_000  # Decoded samples resampled at once (about 10 s)
+
+def _read_pcm16_wav(file_path: str, sampling_rate: int) -> Optional[np.ndarray]:
+    """Read a WAV file that is already 16-bit mono PCM at sampling_rate, or return None"""
+    try:
+        with wave.open(file_path, "rb") as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (1, 2, sampling_rate):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None  # Not a plain PCM WAV file (e.g. float samples or a damaged header)
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+def load_audio(file_path: str, sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an audio (or video) file to mono float32 samples at sampling_rate"""
+    # Fast path: a WAV file recorded as 16 kHz mono 16-bit PCM (what many
+    # recorders and speech tools produce) needs no decoding or resampling,
+    # only a conversion of the samples to float32.
+    if file_path.lower().endswith(".wav"):
+        audio = _read_pcm16_wav(file_path, sampling_rate)
+        if audio is not None:
+            return audio
+
+    # PyAV decodes the file in this process. Decoders return many tiny frames
+    # (~1000 samples each), so we collect them in a FIFO buffer and resample
+    # DECODE_BLOCK_SAMPLES at a time, which keeps the Python overhead per frame
+    # low. The resampler converts straight to float32 ("flt") at 16 kHz, so each
+    # block becomes a numpy array without a detour through 16-bit integers (as
+    # in faster-whisper's decode_audio).
+    #
+    # The resampler keeps the file's channels, and we mix them down to mono by
+    # averaging them. Letting the resampler mix to mono would add the channels
+    # up at almost full level each (stereo comes out ~3 dB louder, 5.1 even more
+    # and past full scale), while the average stays at the level decode_audio
+    # produces and within [-1, 1].
+    resampler = av.AudioResampler(format="flt", rate=sampling_rate)  # No layout: keep the file's
+    fifo = av.AudioFifo()
+    chunks = []
+
+    def resample(frame):
+        for resampled in resampler.resample(frame):
+            # Packed ("flt") samples are interleaved: one row per sample, one column per channel
+            samples = resampled.to_ndarray().reshape(-1, len(resampled.layout.channels))
+            chunks.append(samples[:, 0] if samples.shape[1] == 1 else samples.mean(axis=1, dtype=np.float32))
+
+    with av.open(file_path, metadata_errors="ignore") as container:
+        frames = container.decode(audio=0)
+        while True:
+            try:
+                frame = next(frames)
+            except StopIteration:
+                break
+            except av.error.InvalidDataError:
+                continue  # Skip a damaged frame instead of failing the whole file
+            frame.pts = None  # Let the FIFO join frames even if their timestamps have gaps
+            fifo.write(frame)
+            if fifo.samples >= DECODE_BLOCK_SAMPLES:
+                resample(fifo.read())
+        if fifo.samples > 0:
+            resample(fifo.read())
+        resample(None)  # Flush the samples the resampler still holds
+
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+def pcm_cache_path(file_path: str) -> str:
+    """Path of the decoded-audio cache file for an uploaded file"""
+    return file_path + ".npy"
+
+def _load_pcm(file_path: str) -> np.ndarray:
+    """Decode an audio file to 16 kHz mono float32, reusing the cached copy if present"""
+    cache_path = pcm_cache_path(file_path)
+    if os.path.exists(cache_path):
+        return np.load(cache_path, mmap_mode="r")  # Read-only, loaded on demand
+    audio = load_audio(file_path)
+    np.save(cache_path, audio)
+    return audio
+
+# ----------------------------------------------------------------------------
+# Splitting long audio into chunks
+# ----------------------------------------------------------------------------
+# A single transcribe() call works through the audio one 30-second window after
+# another, so a long file only ever uses one worker. Instead, we find where
+# people are speaking with Silero VAD (Voice Activity Detection, bundled with
+# faster-whisper), cut the audio into chunks at silent points, and transcribe
+# the chunks in parallel on all workers. Chunks are at least CHUNK_MIN_SECONDS
+# long so each transcription still gets enough context; otherwise the speech is
+# split evenly across the workers. (With the default single worker, the whole
+# file is one chunk.)
+CHUNK_MIN_SECONDS = 60
+
+def _sync_plan_chunks(file_path: str) -> list:
+    """Find the speech in an audio file and group it into chunks - runs inside a worker process"""
+    _ensure_model()  # The first step of every job, so a missing model fails it right away
+    audio = _load_pcm(file_path)
+    chunk_samples = max(CHUNK_MIN_SECONDS * SAMPLE_RATE, math.ceil(len(audio) / TRANSCRIBE_WORKERS))
+
+    # Speech regions longer than a chunk are split at a short pause.
+    speech = get_speech_timestamps(
+        audio, VadOptions(max_speech_duration_s=chunk_samples / SAMPLE_RATE)
+    )
+
+    # Merge neighbouring speech regions (in samples) until a chunk is full.
+    chunks = []
+    for region in speech:
+        if chunks and region["end"] - chunks[-1][0] <= chunk_samples:
+            chunks[-1] = (chunks[-1][0], region["end"])
+        else:
+            chunks.append((region["start"], region["end"]))
+    return chunks
+
+def _sync_detect_language(file_path: str, start: int, end: int) -> str:
+    """Detect the spoken language in the samples start:end of an audio file - runs inside a worker process"""
+    _ensure_model()
+    if not worker_model.model.is_multilingual:
+        return "en"  # English-only model (like "medium.en")
+    # Whisper looks at the first 30 seconds of speech to decide the language
+    language, _, _ = worker_model.detect_language(audio=np.asarray(_load_pcm(file_path)[start:end]))
+    return language
+
+def _sync_transcribe_slice(
+    file_path: str,
+    start: int,
+    end: int,
+    language: Optional[str] = None,
+    job_id: Optional[str] = None,
+    chunk_index: int = 0,
+    word_timestamps: bool = False,
+) -> dict:
+    """Transcribe the samples start:end of an audio file - runs inside a worker process"""
+    _ensure_model()
+    audio = _load_pcm(file_path)[start:end]
+
+    # ====================================================================
+    # THE ACTUAL TRANSCRIPTION
+    # ====================================================================
+    # This is where Whisper does the heavy lifting - converting audio to text.
+    # This can take seconds to minutes depending on audio length and model size.
+    # - audio: The decoded audio samples of this chunk
+    # - language: Optional hint (e.g., "en" for English). If None, auto-detects.
+    # - word_timestamps: Get timing info for each word (useful for subtitles).
+    #   This runs an extra alignment pass for every segment, so it is only done
+    #   when the client asks for it; otherwise each segment's "words" is empty.
+    # - beam_size: How many candidate transcriptions the decoder keeps at each step
+    # - vad_filter: Skip silent parts of the audio (Voice Activity Detection)
+    #
+    # faster-whisper returns a lazy generator: the audio is only transcribed as
+    # we iterate over it, so we build the list of segments inside the loop below.
+    if worker_pipeline is not None:
+        # Batched inference (see BATCH_SIZE above); always uses VAD
+        segments_iter, info = worker_pipeline.transcribe(
+            audio,
+            language=language,
+            word_timestamps=word_timestamps,
+            without_timestamps=False,  # Sentence-sized segments (see BATCH_SIZE above)
+            beam_size=5,
+            batch_size=BATCH_SIZE,
+        )
+    else:
+        segments_iter, info = worker_model.transcribe(
+            audio,
+            language=language,
+            word_timestamps=word_timestamps,  # Get word-level timestamps (if requested)
+            beam_size=5,
+            vad_filter=True
+        )
+
+    # Timestamps are relative to the start of the chunk; shift them so they are
+    # relative to the start of the whole file.
+    offset = start / SAMPLE_RATE
+    segments = []
+    for segment in segments_iter:
+        segments.append(segment_to_dict(segment, offset))
+
+        # Send the segment to the server process right away, so clients
+        # streaming this job see it before the whole chunk is done
+        if worker_segment_queue is not None and job_id:
+            worker_segment_queue.put((job_id, chunk_index, segments[-1]))
+
+    # Tell the server process this chunk has no more segments
+    if worker_segment_queue is not None and job_id:
+        worker_segment_queue.put((job_id, chunk_index, None))
+
+    # Return plain data (not faster-whisper objects) so the result can be sent
+    # back to the server process.
+    return {
+        "segments": segments,             # Array of segments with timestamps
+        "language": info.language         # Detected language code
+    }
 
 # ============================================================================
 # DATA MODELS (Pydantic Schemas)
@@ -251,6 +991,27 @@ class TranscriptionResponse(BaseModel):
     segments: Optional[list] = None # Word-level timestamps (null until completed)
     language: Optional[str] = None  # Detected language (null until completed)
     error: Optional[str] = None    # Error message if something went wrong
+    segments_compact: Optional[dict] = None  # Segments as arrays, only if requested (see COMPACT SEGMENTS)
+    progress: Optional[float] = None  # 0.0 to 1.0 (null if unknown, see below)
+
+# A job's progress is how much of its speech has been transcribed so far. The
+# worker processes report every segment as they go (see STREAMING PARTIAL
+# TRANSCRIPTS), so the job's stream keeps track of it without the job store
+# being written on every segment. Only the server process running the job has
+# its stream, so with several processes sharing Redis, other processes report
+# null until the job is finished.
+def job_response(job_id: str, job: dict, compact: bool = False) -> TranscriptionResponse:
+    """Build the response for a job, with either the full or the compact segments"""
+    job = dict(job)  # Don't change the stored job
+    if job["status"] == "completed":
+        job["progress"] = 1.0
+    elif job_id in job_streams:
+        job["progress"] = job_streams[job_id].progress
+    job.pop("segments_compact", None)  # Stored by earlier versions of the server
+    if compact and job.get("segments") is not None:
+        job["segments_compact"] = compact_segments(job["segments"])
+        job["segments"] = None
+    return TranscriptionResponse(job_id=job_id, **job)
 
 # ============================================================================
 # API ENDPOINTS (ROUTES)
@@ -274,10 +1035,244 @@ async def root():
 # ----------------------------------------------------------------------------
 # GET /health - Used by monitoring tools and load balancers to check if the
 # server is healthy and ready to handle requests. Returns whether the model
-# is loaded (if model is None, the server isn't ready yet).
+# is loaded (if model_loaded is False, the server isn't ready yet), whether the
+# startup warmup run succeeded, and which device ("cuda" or "cpu") the model runs on.
+# While the worker processes are broken, or the model failed to load (see
+# Recovering from a crashed worker), it answers 503 Service Unavailable with
+# status "unhealthy"; "model_error" then says why the model didn't load.
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "model_loaded": model is not None}
+async def health_check(response: Response):
+    healthy = workers_healthy and model_load_error is None
+    if not healthy:
+        response.status_code = 503
+    return {
+        "status": "healthy" if healthy else "unhealthy",
+        "model_loaded": model_loaded,
+        "model_error": model_load_error,
+        "warmed_up": model_warmed_up,
+        "workers_healthy": workers_healthy,
+        "device": DEVICE,
+    }
+
+# ============================================================================
+# SEGMENT SERIALIZATION
+# ============================================================================
+# faster-whisper returns Segment and Word objects. We convert them into plain
+# dictionaries so they can be stored in the job and sent to clients as JSON.
+# The keys match the segment shape the frontend expects (see shared/types.ts).
+#
+# offset (in seconds) is added to every timestamp; it is used when the segment
+# comes from a chunk that starts partway through the file.
+def segment_to_dict(segment, offset: float = 0.0) -> dict:
+    """Convert a faster-whisper Segment into a JSON-serializable dict"""
+    return {
+        "id": segment.id,
+        "seek": segment.seek,
+        "start": segment.start + offset,
+        "end": segment.end + offset,
+        "text": segment.text,
+        "tokens": segment.tokens,
+        "temperature": segment.temperature,
+        "avg_logprob": segment.avg_logprob,
+        "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+        "words": [
+            {"word": w.word, "start": w.start + offset, "end": w.end + offset, "probability": w.probability}
+            for w in (segment.words or [])
+        ],
+    }
+
+# ----------------------------------------------------------------------------
+# Merging chunk results
+# ----------------------------------------------------------------------------
+# Chunks come back in the same order as they appear in the file, so merging is
+# just concatenating their segments (renumbering the segment ids) and text.
+# The language is the one detected in the first chunk; if there was no speech
+# at all we fall back to the language hint from the request.
+def merge_chunk_results(chunk_results: list, language: Optional[str] = None) -> dict:
+    """Combine the results of transcribed chunks into a single result"""
+    segments = [segment for chunk in chunk_results for segment in chunk["segments"]]
+    for index, segment in enumerate(segments):
+        segment["id"] = index + 1
+    return {
+        "text": "".join(segment["text"] for segment in segments),  # Full transcribed text
+        "segments": segments,
+        "language": chunk_results[0]["language"] if chunk_results else language
+    }
+
+# ----------------------------------------------------------------------------
+# Compact segments
+# ----------------------------------------------------------------------------
+# The full segments repeat every key name for every segment and word, and send
+# timestamps as floats like 12.340000000000002. For clients that only need the
+# text and the timings, a finished job's segments can also be sent "column by
+# column": one array per field, with timestamps as whole milliseconds. This form
+# is built from the segments when a client asks for it, not stored with the job.
+#
+#   text          The full transcript
+#   starts_ms     Start of each segment, in milliseconds
+#   ends_ms       End of each segment, in milliseconds
+#   text_offsets  Segment i is text[text_offsets[i]:text_offsets[i + 1]]
+#   words         All words joined into one string
+#   word_starts_ms, word_ends_ms, word_offsets   The same for each word
+#   segment_words Segment i has the words segment_words[i] to segment_words[i + 1]
+#
+# Offsets count UTF-16 code units, the way JavaScript indexes strings, so
+# text.slice(start, end) in the browser gets exactly the segment (an emoji, or
+# any other character outside the Basic Multilingual Plane, counts as 2).
+# Clients ask for this form with GET /transcribe/{job_id}?compact=true, or as
+# msgpack (with the arrays as raw int32 bytes) from
+# GET /transcribe/{job_id}/segments.msgpack.
+def to_ms(seconds: list) -> list:
+    """Round a list of times in seconds to whole milliseconds"""
+    return np.rint(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int32).tolist()
+
+def utf16_offsets(texts: list) -> list:
+    """Offsets (in UTF-16 code units) of each text when they are joined together"""
+    return np.cumsum([0] + [len(text.encode("utf-16-le")) // 2 for text in texts]).tolist()
+
+def compact_segments(segments: list) -> dict:
+    """Convert a list of segment dicts into the compact form described above"""
+    words = [word for segment in segments for word in segment["words"]]
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "starts_ms": to_ms([segment["start"] for segment in segments]),
+        "ends_ms": to_ms([segment["end"] for segment in segments]),
+        "text_offsets": utf16_offsets([segment["text"] for segment in segments]),
+        "words": "".join(word["word"] for word in words),
+        "word_starts_ms": to_ms([word["start"] for word in words]),
+        "word_ends_ms": to_ms([word["end"] for word in words]),
+        "word_offsets": utf16_offsets([word["word"] for word in words]),
+        "segment_words": np.cumsum([0] + [len(segment["words"]) for segment in segments]).tolist(),
+    }
+
+# ============================================================================
+# STREAMING PARTIAL TRANSCRIPTS
+# ============================================================================
+# Instead of polling GET /transcribe/{job_id} until the whole file is done,
+# clients can open GET /transcribe/{job_id}/stream and receive each segment
+# as soon as Whisper has transcribed it (see the endpoint below).
+#
+# The segments travel like this:
+# 1. A worker process puts (job_id, chunk_index, segment) on segment_queue for
+#    every segment, and (job_id, chunk_index, None) when its chunk is done
+# 2. relay_segments (a task in the server process) takes them off the queue and
+#    hands them to the JobStream of that job
+# 3. The JobStream passes them on to every client streaming the job
+#
+# Chunks are transcribed in parallel, so segments of a later chunk can arrive
+# before those of an earlier one. JobStream holds them back until all earlier
+# chunks are done, so clients always get the segments in file order (with the
+# same ids they have in the final result).
+class JobStream:
+    """Segments of one running job, passed on in file order to streaming clients"""
+
+    def __init__(self):
+        self.events: list = [("status", {"status": "queued"})]  # Every (event, data) sent so far, replayed to late subscribers
+        self.subscribers: set = set()  # One asyncio.Queue per connected client
+        self.pending: Dict[int, list] = {}  # Segments of chunks we haven't reached yet
+        self.finished_chunks: set = set()
+        self.next_chunk = 0  # The chunk whose segments are currently being sent
+        self.segments_sent = 0
+        self.closed = False
+        self.chunks: list = []  # (start, end) of each chunk in samples, once planned
+        self.seconds_done: Dict[int, float] = {}  # Seconds of each chunk transcribed so far
+
+    @property
+    def progress(self) -> float:
+        """How much of the job's speech has been transcribed, from 0.0 to 1.0"""
+        total = sum(end - start for start, end in self.chunks) / SAMPLE_RATE
+        if not total:
+            return 0.0
+        return round(min(1.0, sum(self.seconds_done.values()) / total), 3)
+
+    def set_status(self, status: str):
+        self._send("status", {"status": status})
+
+    def set_chunks(self, chunks: list):
+        self.chunks = chunks
+
+    def add_segment(self, chunk_index: int, segment: dict):
+        if chunk_index < len(self.chunks):
+            self.seconds_done[chunk_index] = segment["end"] - self.chunks[chunk_index][0] / SAMPLE_RATE
+        if self.closed:
+            return
+        if chunk_index == self.next_chunk:
+            self._send_segment(segment)
+        else:
+            self.pending.setdefault(chunk_index, []).append(segment)
+
+    def finish_chunk(self, chunk_index: int):
+        self.finished_chunks.add(chunk_index)
+        if chunk_index < len(self.chunks):
+            start, end = self.chunks[chunk_index]
+            self.seconds_done[chunk_index] = (end - start) / SAMPLE_RATE
+        # Move on past every finished chunk, sending what the next one has buffered
+        while not self.closed and self.next_chunk in self.finished_chunks:
+            self.next_chunk += 1
+            for segment in self.pending.pop(self.next_chunk, []):
+                self._send_segment(segment)
+
+    def close(self, segments: list, done: dict):
+        """Send any segments not sent yet and the final "done" event"""
+        if self.closed:
+            return
+        # The job's result can be back before the relay has passed on its last
+        # segments; those are sent from the final result instead.
+        for segment in segments[self.segments_sent:]:
+            self._send_segment(dict(segment))
+        self._send("done", done)
+        self.closed = True
+        self.subscribers.clear()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if not self.closed:
+            self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def _send_segment(self, segment: dict):
+        self.segments_sent += 1
+        segment["id"] = self.segments_sent  # Same numbering as merge_chunk_results
+        self._send("segment", segment)
+
+    def _send(self, event: str, data: dict):
+        self.events.append((event, data))
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+# The streams of the jobs running in this server process, by job ID
+job_streams: Dict[str, JobStream] = {}
+
+async def relay_segments(queue):
+    """Pass segments from the worker processes to the streams of their jobs"""
+    loop = asyncio.get_running_loop()
+    while True:
+        # queue.get() blocks until a worker sends something, so wait for it in
+        # a helper thread instead of blocking the event loop
+        try:
+            item = await loop.run_in_executor(None, queue.get)
+        except (EOFError, OSError):  # The manager process has stopped
+            break
+        if item is None:  # Sent at shutdown
+            break
+        job_id, chunk_index, segment = item
+        stream = job_streams.get(job_id)
+        if stream is None:
+            continue
+        if segment is None:
+            stream.finish_chunk(chunk_index)
+        else:
+            stream.add_segment(chunk_index, segment)
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event: an event name and a line of JSON data"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
 
 # ============================================================================
 # BACKGROUND TRANSCRIPTION TASK
@@ -289,47 +1284,85 @@ async def health_check():
 #
 # This is similar to queuing a job in a background worker (like Sidekiq in Ruby
 # or Bull in Node.js), but we're using Python's asyncio for simplicity.
-async def transcribe_audio_task(job_id: str, file_path: str, language: Optional[str] = None):
+async def transcribe_audio_task(
+    job_id: str, file_path: str, language: Optional[str], cache_key: str, word_timestamps: bool = False
+):
     """Background task to transcribe audio - runs asynchronously after API response"""
+    global model_loaded
+    segments, done = [], {"status": "error", "error": "Transcription was cancelled"}
+    pool = executor  # The same pool for the whole job (see restart_workers)
     try:
         logger.info(f"Starting transcription for job {job_id}")
 
         # Update job status so clients polling /transcribe/{job_id} know we're working
-        transcription_jobs[job_id]["status"] = "processing"
+        await job_store.update(job_id, status="processing")
+        if job_id in job_streams:
+            job_streams[job_id].set_status("processing")
 
-        # Extra debug: confirm assets path exists at transcription time
-        mel_path = os.path.join(os.path.dirname(whisper.__file__), "assets", "mel_filters.npz")
-        logger.info(f"[Transcribe] mel_filters path: {mel_path}; exists={os.path.exists(mel_path)}")
+        # Hand the work to the worker processes and wait for the results without
+        # blocking the event loop (other requests keep being served meanwhile).
+        # 1. One worker decodes the file and splits the speech into chunks
+        # 2. All chunks are transcribed at the same time, spread over the workers
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(pool, _sync_plan_chunks, file_path)
+        model_loaded = True  # A worker has loaded the model (only news with LAZY_LOAD_MODEL)
+        set_model_load_error(None)
+        logger.info(f"Job {job_id}: transcribing {len(chunks)} chunk(s)")
+        if job_id in job_streams:
+            job_streams[job_id].set_chunks(chunks)  # Lets the stream work out the job's progress
 
-        # ====================================================================
-        # THE ACTUAL TRANSCRIPTION
-        # ====================================================================
-        # This is where Whisper does the heavy lifting - converting audio to text.
-        # This can take seconds to minutes depending on audio length and model size.
-        # - file_path: Path to the temporary audio file
-        # - language: Optional hint (e.g., "en" for English). If None, auto-detects.
-        # - word_timestamps: Get timing info for each word (useful for subtitles)
-        # - verbose: Print progress to console
-        result = model.transcribe(
-            file_path,
-            language=language,
-            word_timestamps=True,  # Get word-level timestamps
-            verbose=True
-        )
+        # Without a language hint, every chunk would detect the language again
+        # (an extra run of the model each) and could even pick different ones.
+        # Instead we detect it once on the first chunk and use it for all chunks.
+        if language is None and len(chunks) > 1:
+            start, end = chunks[0]
+            language = await loop.run_in_executor(pool, _sync_detect_language, file_path, start, end)
+            logger.info(f"Job {job_id}: detected language '{language}'")
+
+        chunk_results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _sync_transcribe_slice, file_path, start, end, language, job_id, index, word_timestamps)
+            for index, (start, end) in enumerate(chunks)
+        ])
+        result = merge_chunk_results(chunk_results, language)
 
         # ====================================================================
         # SAVE RESULTS
         # ====================================================================
-        # Update the job in our in-memory storage with the transcription results.
+        # Update the job in the job store with the transcription results.
         # Clients can now fetch these results via GET /transcribe/{job_id}
-        transcription_jobs[job_id].update({
-            "status": "completed",
-            "text": result["text"],           # Full transcribed text
-            "segments": result["segments"],   # Array of segments with timestamps
-            "language": result["language"]    # Detected language code
-        })
+        await job_store.update(job_id, status="completed", **result)  # text, segments and language
 
-        logger.info(f"Transcription completed for job {job_id}")
+        # Remember the result so the same file doesn't need to be transcribed again
+        await job_store.set_transcript(cache_key, result)
+
+        segments = result["segments"]
+        done = {"status": "completed", "language": result["language"]}
+        logger.info(f"Transcription completed for job {job_id}: {len(segments)} segment(s)")
+
+    except asyncio.CancelledError:
+        # The server is shutting down. Mark the job as failed, so clients (and,
+        # with Redis, other server processes) don't keep waiting for it.
+        await job_store.update(job_id, status="error", error="Transcription was cancelled (the server shut down)")
+        raise
+
+    except ModelLoadError as e:
+        # The worker is fine, but it has no model (see Recovering from a
+        # crashed worker), so there's nothing to restart. The next job tries
+        # to load the model again.
+        set_model_load_error(str(e))
+        await job_store.update(job_id, status="error", error=str(e))
+        done = {"status": "error", "error": str(e)}
+
+    except BrokenProcessPool:
+        # A worker process died while this job was running (see Recovering
+        # from a crashed worker). Fail this job and start new workers.
+        error = "A transcription worker process crashed (e.g. out of memory), please try again"
+        logger.error(f"Transcription failed for job {job_id}: {error}")
+        await job_store.update(job_id, status="error", error=error)
+        done = {"status": "error", "error": error}
+        restart = asyncio.create_task(restart_workers(pool))
+        background_tasks_set.add(restart)
+        restart.add_done_callback(background_tasks_set.discard)
 
     except Exception as e:
         # ====================================================================
@@ -338,18 +1371,39 @@ async def transcribe_audio_task(job_id: str, file_path: str, language: Optional[
         # If anything goes wrong (file corruption, model error, etc.), mark the
         # job as failed and store the error message so the client knows what happened.
         logger.error(f"Transcription failed for job {job_id}: {str(e)}")
-        transcription_jobs[job_id].update({
-            "status": "error",
-            "error": str(e)
-        })
+        await job_store.update(job_id, status="error", error=str(e))
+        done = {"status": "error", "error": str(e)}
     finally:
+        # End the job's stream, so clients streaming it know it is finished
+        stream = job_streams.pop(job_id, None)
+        if stream is not None:
+            stream.close(segments, done)
+
         # ====================================================================
         # CLEANUP
         # ====================================================================
-        # Always delete the temporary file, even if transcription failed.
-        # This prevents disk space from filling up with old audio files.
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Always delete the temporary files (the upload and its decoded audio),
+        # even if transcription failed. This prevents disk space from filling up
+        # with old audio files.
+        for path in (file_path, pcm_cache_path(file_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+# ============================================================================
+# UPLOAD LIMITS
+# ============================================================================
+# Uploads are copied to disk in chunks of UPLOAD_CHUNK_SIZE bytes (1 MB).
+# MAX_UPLOAD_SIZE rejects uploads larger than 500 MB by default; set the
+# MAX_UPLOAD_MB environment variable to change it.
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MB
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_MB", "500")) * 1024 * 1024
+
+# The file extensions we accept, and a regular expression that finds the
+# extension at the end of a file name (a dot followed by anything but another
+# dot or a slash). Both are built once here instead of on every upload.
+ALLOWED_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.flv', '.wmv', '.aac', '.ogg'})
+ALLOWED_EXTENSIONS_TEXT = ", ".join(sorted(ALLOWED_EXTENSIONS))  # For error messages
+EXTENSION_RE = re.compile(r"\.[^./\\]+$")
 
 # ============================================================================
 # MAIN TRANSCRIPTION ENDPOINT
@@ -362,24 +1416,29 @@ async def transcribe_audio_task(job_id: str, file_path: str, language: Optional[
 # 4. Creates a job and starts background transcription
 # 5. Returns immediately with a job ID (doesn't wait for transcription)
 #
-# The client then polls GET /transcribe/{job_id} to check status and get results.
+# The client then polls GET /transcribe/{job_id} to check status and get results,
+# or streams the segments as they are transcribed from GET /transcribe/{job_id}/stream.
 @app.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
+    response: Response,  # Used to set the ETag header (for cached transcripts)
     file: UploadFile = File(...),  # File(...) means this parameter is required
-    language: Optional[str] = None  # Optional language hint (e.g., "en", "es")
+    language: Optional[str] = None,  # Optional language hint (e.g., "en", "es")
+    word_timestamps: bool = False  # Also time every word (slower)
 ):
     """
     Upload an audio file for transcription
 
     - **file**: Audio file (mp3, wav, m4a, mp4, etc.)
     - **language**: Optional language code (e.g., 'en', 'es', 'fr'). If not specified, Whisper will auto-detect.
+    - **word_timestamps**: Also return the start and end time of every word (slower). Segments always have timestamps.
     """
     # ========================================================================
     # VALIDATION: Check if model is loaded
     # ========================================================================
     # If the model isn't loaded yet (shouldn't happen, but safety check),
-    # return a 503 Service Unavailable error.
-    if not model:
+    # return a 503 Service Unavailable error. With LAZY_LOAD_MODEL the first
+    # transcription loads the model, so uploads are accepted before that.
+    if not (model_loaded or LAZY_LOAD_MODEL):
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     # ========================================================================
@@ -394,15 +1453,16 @@ async def transcribe_audio(
     # ========================================================================
     # Check that the uploaded file has a supported extension.
     # We validate this before saving to disk to avoid wasting resources.
-    allowed_extensions = {'.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.flv', '.wmv', '.aac', '.ogg'}
-    file_extension = os.path.splitext(file.filename)[1].lower()  # Get extension, lowercase
+    match = EXTENSION_RE.search(file.filename or "")
+    file_extension = match.group(0).lower() if match else ""  # Get extension, lowercase
 
-    if file_extension not in allowed_extensions:
+    if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,  # Bad Request
-            detail=f"Unsupported file type: {file_extension}. Supported: {', '.join(allowed_extensions)}"
+            detail=f"Unsupported file type: {file_extension}. Supported: {ALLOWED_EXTENSIONS_TEXT}"
         )
 
+    temp_file_path = None  # Set once the upload is being saved
     try:
         # ====================================================================
         # SAVE UPLOADED FILE TO DISK
@@ -410,24 +1470,76 @@ async def transcribe_audio(
         # FastAPI gives us the file as a stream. We need to save it to disk
         # because Whisper needs a file path to process it.
         #
-        # tempfile.NamedTemporaryFile creates a temporary file that will be
-        # deleted later. We set delete=False because we need to keep it until
+        # aiofiles.tempfile.NamedTemporaryFile creates a temporary file that will
+        # be deleted later. We set delete=False because we need to keep it until
         # transcription completes (it gets deleted in the background task).
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()  # Read the entire file into memory
-            temp_file.write(content)      # Write it to the temporary file
+        # aiofiles runs the actual disk writes in a helper thread, so a slow
+        # disk doesn't block the event loop while a large file is being saved.
+        #
+        # We copy the upload in 1 MB chunks instead of reading it all at once, so
+        # memory use stays constant no matter how large the file is. While copying
+        # we count the bytes and stop with 413 (Payload Too Large) once the upload
+        # goes over MAX_UPLOAD_SIZE. We also feed every chunk into a hash (a short
+        # fingerprint of the file's content) for the transcript cache below.
+        bytes_written = 0
+        hasher = hashlib.blake2b(digest_size=16)
+        async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, suffix=file_extension) as temp_file:
             temp_file_path = temp_file.name  # Get the path for later use
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                bytes_written += len(chunk)
+                if bytes_written > MAX_UPLOAD_SIZE:
+                    break
+                await temp_file.write(chunk)  # Write this chunk to the temporary file
+                hasher.update(chunk)
+
+        if bytes_written > MAX_UPLOAD_SIZE:
+            os.remove(temp_file_path)  # Don't keep the partial upload around
+            raise HTTPException(
+                status_code=413,  # Payload Too Large
+                detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024 * 1024)} MB"
+            )
+
+        # ====================================================================
+        # TRANSCRIPT CACHE
+        # ====================================================================
+        # If this exact file (same content hash) was already transcribed with
+        # the same language and word_timestamps settings and the same model
+        # settings (TRANSCRIPT_SETTINGS), reuse that transcript: the job is
+        # completed immediately and no transcription runs. The response then
+        # is the transcript, so it gets the cache key as its (weak) ETag header,
+        # which identifies this transcript for HTTP caches.
+        cache_key = (
+            f"{hasher.hexdigest()}-{language or 'auto'}"
+            + ("-words" if word_timestamps else "")
+            + f"-{TRANSCRIPT_SETTINGS}"
+        )
+
+        cached = await job_store.get_transcript(cache_key)
+        if cached is not None:
+            response.headers["ETag"] = weak_etag(cache_key)
+            os.remove(temp_file_path)  # Not needed, we already have the transcript
+            await job_store.set(job_id, {
+                "status": "completed",
+                "filename": file.filename,
+                "cache_key": cache_key,
+                **cached  # text, segments and language
+            })
+            logger.info(f"Job {job_id}: reusing cached transcript {cache_key}")
+            return job_response(job_id, {"status": "completed", **cached})
 
         # ====================================================================
         # CREATE JOB RECORD
         # ====================================================================
-        # Store job information in our in-memory dictionary.
+        # Store job information in the job store.
         # The status starts as "queued" and will be updated by the background task.
-        transcription_jobs[job_id] = {
+        await job_store.set(job_id, {
             "status": "queued",
             "filename": file.filename,
-            "language": language
-        }
+            "language": language,
+            "word_timestamps": word_timestamps,
+            "cache_key": cache_key
+        })
+        job_streams[job_id] = JobStream()  # Clients can stream the job from now on
 
         # ====================================================================
         # START BACKGROUND TRANSCRIPTION
@@ -438,7 +1550,7 @@ async def transcribe_audio(
         #
         # asyncio.create_task schedules the function to run concurrently.
         # We add it to background_tasks_set so we can cancel it on shutdown.
-        task = asyncio.create_task(transcribe_audio_task(job_id, temp_file_path, language))
+        task = asyncio.create_task(transcribe_audio_task(job_id, temp_file_path, language, cache_key, word_timestamps))
         background_tasks_set.add(task)  # Track it for cleanup
         task.add_done_callback(background_tasks_set.discard)  # Remove from set when done
 
@@ -449,15 +1561,21 @@ async def transcribe_audio(
         # poll for status and results later.
         return TranscriptionResponse(
             job_id=job_id,
-            status="queued"
+            status="queued",
+            progress=0.0
         )
 
+    except HTTPException:
+        raise  # Errors we raised on purpose (like 413) already have the right status
     except Exception as e:
         # ====================================================================
         # ERROR HANDLING
         # ====================================================================
-        # If anything goes wrong during file upload or task creation,
-        # log the error and return a 500 Internal Server Error.
+        # If anything goes wrong during file upload or task creation (disk
+        # full, Redis unreachable, ...), log the error and return a 500 Internal
+        # Server Error. The saved upload won't be transcribed, so delete it.
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
         logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -470,26 +1588,223 @@ async def transcribe_audio(
 # to check if transcription is complete. When status is "completed", the response
 # includes the transcribed text and segments.
 #
+# Polling is deprecated for waiting on a job: use the WebSocket at
+# /transcribe/ws/{job_id} (one message when the job is finished) or the
+# Server-Sent Events at /transcribe/{job_id}/stream (segments as they come).
+# This endpoint stays for existing clients and for fetching a finished job again.
+#
 # The {job_id} in the path is a path parameter - FastAPI extracts it from the URL.
-@app.get("/transcribe/{job_id}", response_model=TranscriptionResponse)
-async def get_transcription_status(job_id: str):
+# With ?compact=true, a completed job returns segments_compact (see COMPACT
+# SEGMENTS) instead of the much larger segments list.
+#
+# A completed job's transcript never changes, so it gets an ETag (the
+# transcript cache key). A client that sends it back in If-None-Match gets an
+# empty 304 Not Modified instead of the whole transcript again, and nothing
+# has to be serialized.
+#
+# The ETags are "weak" (W/"..."): GZipMiddleware sends the same response
+# either compressed or not, and a strong ETag would promise byte-for-byte the
+# same body. If-None-Match is compared the weak way too (ignoring W/).
+def weak_etag(tag: str) -> str:
+    """Format a weak ETag header value"""
+    return f'W/"{tag}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Check whether the client already has the response with this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags or "*" in tags
+
+@app.get("/transcribe/{job_id}", response_model=TranscriptionResponse, deprecated=True)
+async def get_transcription_status(job_id: str, request: Request, response: Response, compact: bool = False):
     """Get the status and results of a transcription job"""
-    # Check if the job exists
-    if job_id not in transcription_jobs:
+    # Get the job data and check that the job exists
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Completed jobs get the same ETag as the upload response (the compact
+    # form is a different response, so it gets its own)
+    if job["status"] == "completed" and job.get("cache_key"):
+        etag = weak_etag(f"{job['cache_key']}-compact" if compact else job["cache_key"])
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+    # Return the job data
+    return job_response(job_id, job, compact)
+
+# ----------------------------------------------------------------------------
+# Compact segments as msgpack
+# ----------------------------------------------------------------------------
+# GET /transcribe/{job_id}/segments.msgpack - The compact segments of a completed
+# job in msgpack format. Every array is sent as raw little-endian int32 bytes
+# (4 bytes per number), which JavaScript reads directly with new Int32Array().
+@app.get("/transcribe/{job_id}/segments.msgpack")
+async def get_transcription_msgpack(job_id: str, request: Request):
+    """Get the compact segments of a completed transcription job as msgpack"""
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, not completed")
+
+    headers = {"ETag": weak_etag(f"{job['cache_key']}-msgpack")} if job.get("cache_key") else None
+    if headers and not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    segments_compact = compact_segments(job["segments"])
+    packed = {
+        key: np.asarray(value, dtype="<i4").tobytes() if isinstance(value, list) else value
+        for key, value in segments_compact.items()
+    }
+    return Response(content=msgpack.packb(packed), media_type="application/msgpack", headers=headers)
+
+# ============================================================================
+# JOB STREAM ENDPOINT
+# ============================================================================
+# GET /transcribe/{job_id}/stream - Receive a job's segments while it runs
+#
+# Instead of returning one JSON response, this keeps the connection open and
+# sends Server-Sent Events (SSE), which browsers read with EventSource:
+#
+#   event: status
+#   data: {"status": "processing"}
+#
+#   event: segment
+#   data: {"id": 1, "start": 0.0, "end": 4.2, "text": " Hello", ...}
+#
+#   event: done
+#   data: {"status": "completed", "language": "en"}
+#
+# A "status" event is sent whenever the job's status changes ("queued",
+# "processing"), one "segment" event per segment, in order, as soon as it has
+# been transcribed, and finally a single "done" event (status "completed" or
+# "error") when the job is finished. Clients that connect late first get the
+# events sent so far, so the segments always add up to the full transcript.
+#
+# Jobs that are already finished (or that run in another server process, when
+# several share a Redis job store) have no JobStream here. For those we check
+# the job store every STREAM_POLL_SECONDS until the job is finished (here, in
+# the server, so the client doesn't have to) and then send its segments.
+STREAM_POLL_SECONDS = 1.0
+
+async def wait_for_job(job_id: str) -> Optional[dict]:
+    """Wait until a job is finished and return it (None if it was deleted or expired)"""
+    stream = job_streams.get(job_id)
+    if stream is not None:
+        queue = stream.subscribe()
+        try:
+            while (await queue.get())[0] != "done":
+                pass
+        finally:
+            stream.unsubscribe(queue)
+
+    # The job store is updated before the stream is closed, so a job from a
+    # local stream is finished here already and the loop doesn't run
+    job = await job_store.get(job_id)
+    while job is not None and job["status"] in ACTIVE_STATUSES:
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+        job = await job_store.get(job_id)
+    return job
+
+@app.get("/transcribe/{job_id}/stream")
+async def stream_transcription(job_id: str):
+    """Stream the segments of a transcription job as Server-Sent Events"""
+    if await job_store.get(job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # Get the job data and return it
-    # The **job syntax "unpacks" the dictionary, so all keys become function arguments
-    job = transcription_jobs[job_id]
-    return TranscriptionResponse(
-        job_id=job_id,
-        **job  # Spread operator equivalent - passes all job fields to TranscriptionResponse
+    async def events():
+        stream = job_streams.get(job_id)
+        if stream is not None:
+            queue = stream.subscribe()
+            try:
+                while True:
+                    event, data = await queue.get()
+                    yield format_sse(event, data)
+                    if event == "done":
+                        return
+            finally:
+                stream.unsubscribe(queue)
+
+        job = await job_store.get(job_id)
+        status = None
+        while job is not None and job["status"] in ACTIVE_STATUSES:
+            if job["status"] != status:
+                status = job["status"]
+                yield format_sse("status", {"status": status})
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+            job = await job_store.get(job_id)
+        if job is None:  # Deleted (or expired) while we were waiting
+            yield format_sse("done", {"status": "error", "error": "Job not found"})
+            return
+        for segment in job.get("segments") or []:
+            yield format_sse("segment", segment)
+        if job["status"] == "completed":
+            yield format_sse("done", {"status": "completed", "language": job.get("language")})
+        else:
+            yield format_sse("done", {"status": job["status"], "error": job.get("error")})
+
+    # no-cache and X-Accel-Buffering stop browsers and proxies (like nginx)
+    # from holding events back
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+# ============================================================================
+# JOB COMPLETION WEBSOCKET
+# ============================================================================
+# WS /transcribe/ws/{job_id} - Get a job's result as soon as it is finished
+#
+# For clients that only want the final result, not every segment: the client
+# opens a WebSocket, the server waits until the job is finished and then sends
+# one message (the same JSON as GET /transcribe/{job_id} returns) and closes
+# the connection. This replaces polling GET /transcribe/{job_id}, which sends a
+# request every few seconds and can only notice the result on the next poll.
+# An unknown job ID closes the connection with code 4404.
+@app.websocket("/transcribe/ws/{job_id}")
+async def transcription_websocket(websocket: WebSocket, job_id: str):
+    """Send a transcription job's result over a WebSocket once the job is finished"""
+    await websocket.accept()
+    if await job_store.get(job_id) is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+
+    # Wait for the job and, at the same time, for the client to disconnect, so a
+    # client that goes away doesn't leave us waiting (and, with Redis, checking
+    # the job store every second) until the job is finished
+    waiting = asyncio.create_task(wait_for_job(job_id))
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if not waiting.done():
+            return  # The client went away before the job finished
+        job = waiting.result()
+        if job is None:  # Deleted (or expired) while we were waiting
+            await websocket.close(code=4404, reason="Job not found")
+            return
+        await websocket.send_text(job_response(job_id, job).model_dump_json())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass  # The client went away while we were sending
+    finally:
+        # Stops whichever is still waiting (wait_for_job unsubscribes from the stream)
+        waiting.cancel()
+        disconnected.cancel()
+
+async def wait_for_disconnect(websocket: WebSocket):
+    """Wait until the client closes the WebSocket (messages from it are ignored)"""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
 # ============================================================================
 # DELETE JOB ENDPOINT
 # ============================================================================
-# DELETE /transcribe/{job_id} - Remove a transcription job from memory
+# DELETE /transcribe/{job_id} - Remove a transcription job from the job store
 #
 # This is useful for cleanup - once the client has the results, they can delete
 # the job to free up memory. In production with a database, this would delete
@@ -497,11 +1812,10 @@ async def get_transcription_status(job_id: str):
 @app.delete("/transcribe/{job_id}")
 async def delete_transcription_job(job_id: str):
     """Delete a completed transcription job"""
-    if job_id not in transcription_jobs:
+    # Remove the job from the job store (returns False if it didn't exist)
+    if not await job_store.delete(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # Remove the job from our in-memory dictionary
-    del transcription_jobs[job_id]
     return {"message": "Job deleted successfully"}
 
 # ============================================================================
@@ -512,20 +1826,28 @@ async def delete_transcription_job(job_id: str):
 # This is a utility endpoint that tells clients what models are available
 # and their characteristics (size, speed, accuracy). Useful for documentation
 # or if you want to let users choose model size in the future.
+#
+# The answer never changes, so it is built and converted to JSON once, when the
+# server starts, and every request just sends the same bytes.
+MODELS_INFO = {
+    "current_model": MODEL_SIZE,
+    "available_models": {
+        "tiny": {"size": "39 MB", "speed": "~32x realtime", "accuracy": "lowest"},
+        "base": {"size": "74 MB", "speed": "~16x realtime", "accuracy": "good"},
+        "small": {"size": "244 MB", "speed": "~6x realtime", "accuracy": "better"},
+        "medium": {"size": "769 MB", "speed": "~2x realtime", "accuracy": "great"},
+        "large-v3": {"size": "1550 MB", "speed": "~1x realtime", "accuracy": "best"}
+    }
+}
+MODELS_INFO_JSON = orjson.dumps(MODELS_INFO)
+
+# The handlers stay "async def" although they don't await anything: FastAPI
+# runs plain "def" handlers in a thread pool, which costs more than calling a
+# coroutine directly on the event loop.
 @app.get("/models")
 async def get_available_models():
     """Get information about available Whisper models"""
-    models_info = {
-        "current_model": MODEL_SIZE,
-        "available_models": {
-            "tiny": {"size": "39 MB", "speed": "~32x realtime", "accuracy": "lowest"},
-            "base": {"size": "74 MB", "speed": "~16x realtime", "accuracy": "good"},
-            "small": {"size": "244 MB", "speed": "~6x realtime", "accuracy": "better"},
-            "medium": {"size": "769 MB", "speed": "~2x realtime", "accuracy": "great"},
-            "large-v3": {"size": "1550 MB", "speed": "~1x realtime", "accuracy": "best"}
-        }
-    }
-    return models_info
+    return Response(content=MODELS_INFO_JSON, media_type="application/json")
 
 # ============================================================================
 # SIGNAL HANDLERS (GRACEFUL SHUTDOWN)
@@ -547,6 +1869,22 @@ def signal_handler(signum, frame):
 #
 # uvicorn is an ASGI server (like how Node.js needs a server to run Express).
 # It handles the low-level HTTP protocol and runs our FastAPI app.
+#
+# uvicorn automatically uses two faster components when they are installed
+# (both are in requirements.txt):
+# - uvloop: A faster drop-in replacement for asyncio's event loop, built on
+#   libuv (the event loop of Node.js). Not available on Windows, where the
+#   standard asyncio loop is used instead.
+# - httptools: A fast HTTP parser (the one Node.js uses) instead of the
+#   pure-Python h11
+#
+# workers sets how many server processes to run (WEB_CONCURRENCY, default 1).
+# More server processes can answer more requests at once, but each one starts
+# its own transcription workers with their own copies of the model, and they
+# share jobs only through Redis - so set REDIS_URL when using more than one. To
+# transcribe more files at once, raising TRANSCRIBE_WORKERS uses less memory.
+# (Loading the model once before forking, like gunicorn --preload, wouldn't
+# share it: the model lives in the spawned worker processes, not in these.)
 if __name__ == "__main__":
     import uvicorn  # ASGI server for FastAPI
 
@@ -554,8 +1892,17 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)   # System termination
 
+    if WEB_CONCURRENCY > 1 and not REDIS_URL:
+        logger.warning("WEB_CONCURRENCY > 1 without REDIS_URL: each server process will only know its own jobs")
+
     # Start the server
+    # - "main:app" tells uvicorn where to find our FastAPI application instance
+    #   (by name, so that every server process can import it)
     # - host="0.0.0.0" means listen on all network interfaces (accessible from other devices)
     # - port=8000 is the port the server runs on
-    # - app is our FastAPI application instance
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=WEB_CONCURRENCY,
+    )
\ No newline at end of file
@@ -4,7 +4,7 @@
 // This file contains a TypeScript class that acts as a client for the FastAPI
 // backend. It handles all HTTP requests to the transcription API, including:
 // - Uploading audio files with progress tracking
-// - Polling for transcription status
+// - Waiting for transcription jobs to finish (over a WebSocket, or polling)
 // - Managing transcription jobs
 //
 // Think of this as similar to an Axios instance or a custom fetch wrapper
@@ -19,6 +19,28 @@ import type { TranscriptionJob, ModelInfo } from "../../../shared/types";
 // backend URL. The backend runs on port 8000 by default.
 const API_BASE_URL = "http://localhost:8000";
 
+// The same server, but with the WebSocket protocol (ws:// or wss://)
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, "ws");
+
+// How many status checks in a row may fail before waitForCompletion gives up
+const MAX_POLL_FAILURES = 5;
+
+// Resolves after ms milliseconds, or rejects as soon as signal is aborted
+function sleep(ms: number, signal?: AbortSignal): Promise<void> {
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) return reject(new Error("Aborted"));
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener(
+      "abort",
+      () => {
+        clearTimeout(timer);
+        reject(new Error("Aborted"));
+      },
+      { once: true }
+    );
+  });
+}
+
 // ============================================================================
 // TRANSCRIPTION API CLASS
 // ============================================================================
@@ -182,6 +204,101 @@ export class TranscriptionAPI {
     return this.request<TranscriptionJob>(`/transcribe/${jobId}`);
   }
 
+  // ========================================================================
+  // WAIT FOR COMPLETION
+  // ========================================================================
+  // Waits until a transcription job is finished and resolves with the
+  // finished job (status "completed" or "error").
+  //
+  // Instead of asking the backend every few seconds whether the job is done
+  // (polling), we open a WebSocket and the backend sends us one message as
+  // soon as the job is finished. The message is the same JSON that
+  // getTranscriptionStatus() returns.
+  //
+  // If the WebSocket closes before that message arrives (network blip, backend
+  // restart), we fall back to polling getTranscriptionStatus(), waiting longer
+  // after every failed check. It rejects if the job no longer exists (404) or
+  // the backend can't be reached MAX_POLL_FAILURES times in a row.
+  //
+  // Parameters:
+  // - jobId: The job to wait for
+  // - signal: Optional AbortSignal to stop waiting (from an AbortController)
+  static async waitForCompletion(
+    jobId: string,
+    signal?: AbortSignal
+  ): Promise<TranscriptionJob> {
+    try {
+      return await this.waitOverWebSocket(jobId, signal);
+    } catch (error) {
+      if (signal?.aborted) throw error;
+      console.warn("WebSocket closed early, polling the job status:", error);
+    }
+    return this.pollUntilFinished(jobId, signal);
+  }
+
+  // Resolves with the one message the backend sends on /transcribe/ws/{jobId}
+  private static waitOverWebSocket(
+    jobId: string,
+    signal?: AbortSignal
+  ): Promise<TranscriptionJob> {
+    return new Promise((resolve, reject) => {
+      const socket = new WebSocket(`${WS_BASE_URL}/transcribe/ws/${jobId}`);
+      let finished = false;
+
+      // Aborting closes the socket, which rejects below
+      signal?.addEventListener("abort", () => socket.close(), { once: true });
+
+      // The backend sends exactly one message: the finished job
+      socket.addEventListener("message", (event) => {
+        try {
+          finished = true;
+          resolve(JSON.parse(event.data));
+        } catch (e) {
+          console.error("JSON Parse Error:", e);
+          reject(new Error("Invalid JSON response"));
+        }
+      });
+
+      // Closing without a message means the job doesn't exist (code 4404),
+      // the connection was lost, or the caller aborted
+      socket.addEventListener("close", (event) => {
+        if (!finished) {
+          reject(
+            new Error(
+              `Connection closed before the job finished: ${event.code} ${event.reason}`
+            )
+          );
+        }
+      });
+    });
+  }
+
+  // Checks the job status until it is finished: after 1 s, then 2 s, 4 s, ...
+  // (at most 10 s apart). Network errors are retried, a 404 is not.
+  private static async pollUntilFinished(
+    jobId: string,
+    signal?: AbortSignal
+  ): Promise<TranscriptionJob> {
+    let delay = 1000;
+    let failures = 0;
+    while (true) {
+      await sleep(delay, signal);
+      try {
+        const job = await this.getTranscriptionStatus(jobId);
+        if (job.status === "completed" || job.status === "error") {
+          return job;
+        }
+        failures = 0;
+      } catch (error) {
+        failures += 1;
+        const notFound =
+          error instanceof Error && error.message.startsWith("API Error: 404");
+        if (notFound || failures >= MAX_POLL_FAILURES) throw error;
+      }
+      delay = Math.min(delay * 2, 10000);
+    }
+  }
+
   // ========================================================================
   // DELETE JOB
   // ========================================================================
@@ -209,10 +326,14 @@ export class TranscriptionAPI {
   // ========================================================================
   // Checks if the backend is running and if the Whisper model is loaded.
   // Useful for showing connection status in the UI or for monitoring.
-  // Returns: { status: "healthy", model_loaded: true/false }
+  // Returns: { status: "healthy", model_loaded: true/false, model_error: null or why the model failed to load, warmed_up: true/false, workers_healthy: true/false, device: "cuda"/"cpu" }
   static async healthCheck(): Promise<{
     status: string;
     model_loaded: boolean;
+    model_error: string | null;
+    warmed_up: boolean;
+    workers_healthy: boolean;
+    device: string;
   }> {
     return this.request("/health");
   }
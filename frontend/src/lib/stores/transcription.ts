@@ -221,6 +221,24 @@ function createTranscriptionStore() {
       }));
     },
 
+    // ========================================================================
+    // FAIL JOB
+    // ========================================================================
+    // Marks a job as failed on our side, e.g. when we lost the connection to
+    // the backend while waiting for it, and shows the message in the UI.
+    failJob(jobId: string, message: string) {
+      update((state) => {
+        const fail = (j: TranscriptionJob) =>
+          j.job_id === jobId ? { ...j, status: "error" as const, error: message } : j;
+        return {
+          ...state,
+          jobs: state.jobs.map(fail),
+          currentJob: state.currentJob ? fail(state.currentJob) : null,
+          error: message,
+        };
+      });
+    },
+
     // ========================================================================
     // CANCEL UPLOAD
     // ========================================================================
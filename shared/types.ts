@@ -6,6 +6,23 @@ export interface TranscriptionJob {
   language?: string;
   error?: string;
   filename?: string;
+  segments_compact?: CompactSegments;
+  progress?: number | null; // 0 to 1, null if unknown
+}
+
+// Segments as parallel arrays, returned by GET /transcribe/{job_id}?compact=true
+// (times in milliseconds; offsets are UTF-16 code units, i.e. JavaScript
+// string indices, so text.slice(text_offsets[i], text_offsets[i + 1]) is segment i)
+export interface CompactSegments {
+  text: string;
+  starts_ms: number[];
+  ends_ms: number[];
+  text_offsets: number[];
+  words: string;
+  word_starts_ms: number[];
+  word_ends_ms: number[];
+  word_offsets: number[];
+  segment_words: number[];
 }
 
 export interface TranscriptionSegment {